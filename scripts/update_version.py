@@ -1,11 +1,10 @@
+import tomllib
 from pathlib import Path
 
-import toml
-
 from xlsql.version import VERSION
 
 project = Path("pyproject.toml")
-xlsql = toml.loads(project.read_text())
+xlsql = tomllib.loads(project.read_text())
 
 if not VERSION == xlsql["tool"]["poetry"]["version"]:
     import sys
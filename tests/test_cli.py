@@ -1,4 +1,15 @@
+import datetime
+import sqlite3
+import tempfile
 import unittest
+from contextlib import closing
+from functools import partial
+from pathlib import Path
+from unittest import mock
+
+import click
+import openpyxl
+from click.testing import CliRunner
 
 from xlsql import cli
 
@@ -14,6 +25,12 @@ class TestCli(unittest.TestCase):
         test("Filters punctuation!", "filters_punctuation")
         test("Replaces-hyphens", "replaces_hyphens")
         test("ID (SECRET)", "id_secret")
+        test("_____name", "name")
+        test("name_____", "name")
+        test("a__-- __b", "a_b")
+        test("_" * 10_000 + "long" + "-" * 10_000, "long")
+        test("!?_", "EMPTY")
+        test(None, "EMPTY")
 
     def test_get_column_names(self):
         def test(sheet_name, headings, expected):
@@ -24,6 +41,282 @@ class TestCli(unittest.TestCase):
         test("Sheet1", ["Name", "ID", "Address"], ["name", "id", "address"])
         test("Sheet2", ["Name", "ID", "Address"], ["name", "id", "address"])
         test("Sheet1", ["", ""], ["EMPTY", "EMPTY_2"])
+        test("Sheet1", ["a", "a", "a_2", "a"], ["a", "a_2", "a_2_2", "a_3"])
+        test("Sheet1", ["a", "a_2", "a_3", "a", "a"], ["a", "a_2", "a_3", "a_4", "a_5"])
+        test("Sheet1", ["a"] * 10_000, ["a"] + [f"a_{i}" for i in range(2, 10_001)])
+
+    def test_get_column_types(self):
+        def test(rows, expected):
+            self.assertEqual(expected, cli.get_column_types(rows))
+
+        test([], [])
+        test([(1, 1.5, "a", None)], ["INTEGER", "REAL", "TEXT", ""])
+        test([(1.5, 1), (2.5, "b")], ["REAL", ""])
+        test([(1,), (2.5,)], [""])
+        test([(1, datetime.date(2024, 1, 1)), (2, "b")], ["INTEGER", "TEXT"])
+        test([(True,), (datetime.datetime(2024, 1, 1),)], [""])
+        test([(datetime.date(2024, 1, 1), None), (None, 1)], ["TEXT", "INTEGER"])
+
+    def test_get_logger(self):
+        self.assertIs(print, cli.get_logger(True))
+        with mock.patch("builtins.print") as printed:
+            cli.get_logger(False)("message")
+        printed.assert_not_called()
+
+    def test_get_markers(self):
+        self.assertEqual("(?)", cli.get_markers(1))
+        self.assertEqual("(?, ?, ?)", cli.get_markers(3))
+        self.assertEqual("(?, ?), (?, ?)", cli.get_markers(2, 2))
+
+    def test_compile_flattener(self):
+        def test(selected, width, rows, expected):
+            flatten = cli.compile_flattener(selected, width)
+            self.assertEqual(expected, flatten(rows))
+
+        rows = [(1, 2, 3), (4, 5, 6)]
+        test([0, 1, 2], 3, rows, (1, 2, 3, 4, 5, 6))
+        test([2, 0], 3, rows, (3, 1, 6, 4))
+        test([1], 3, rows, (2, 5))
+        test([1], 3, [], ())
+
+    def test_drop_empty_rows(self):
+        def test(selected, expected):
+            rows = [(1, None, None), (None, 2, None), (None, None, None)]
+            self.assertEqual(
+                expected, list(cli.drop_empty_rows(iter(rows), selected, 3))
+            )
+
+        test([0, 1, 2], [(1, None, None), (None, 2, None)])
+        test([0, 2], [(1, None, None)])
+        test([1], [(None, 2, None)])
+        test([2], [])
+
+    def test_write_rows(self):
+        def test(rows_per_insert, rows):
+            db = sqlite3.connect(":memory:")
+            self.addCleanup(db.close)
+            db.execute("CREATE TABLE t (a, b)")
+            total = cli.write_rows(
+                db.cursor(),
+                "INSERT INTO t VALUES (?, ?)",
+                f"INSERT INTO t VALUES {', '.join(['(?, ?)'] * rows_per_insert)}",
+                rows_per_insert,
+                cli.compile_flattener([0, 2], 3),
+                iter(rows),
+            )
+            self.assertEqual(len(rows), total)
+            expected = [(row[0], row[2]) for row in rows]
+            self.assertEqual(expected, db.execute("SELECT * FROM t").fetchall())
+
+        rows = [(i, None, str(i)) for i in range(7)]
+        test(1, rows)
+        test(3, rows)
+        test(7, rows)
+        test(10, rows)
+        test(3, [])
+
+    def test_load_sheet(self):
+        class Workbook:
+            def iter_rows(self, sheet_name):
+                return iter(sheets[sheet_name])
+
+        sheets = {
+            "Empty": [],
+            "People": [("ID", "Name", "Age"), (1, None, 30), (2, "Bob", 31)],
+        }
+
+        def test(sheet_name, column, index, primary_key, expected_sql, expected):
+            db = sqlite3.connect(":memory:", isolation_level=None)
+            self.addCleanup(db.close)
+            indexed = cli.load_sheet(
+                db.cursor(),
+                Workbook(),
+                sheet_name,
+                column,
+                index,
+                primary_key,
+                False,
+                cli.get_logger(False),
+            )
+            self.assertEqual(
+                expected_sql,
+                [sql for sql, in db.execute("SELECT sql FROM sqlite_master")],
+            )
+            if expected_sql:
+                count = db.execute("SELECT COUNT(*) FROM people").fetchone()[0]
+                self.assertEqual(len(sheets[sheet_name]) - 1, count)
+            self.assertEqual(expected, indexed)
+
+        test("Empty", frozenset(), frozenset(), frozenset(), [], [])
+        test("People", frozenset({"x"}), frozenset(), frozenset(), [], [])
+        test(
+            "People",
+            frozenset(),
+            frozenset(),
+            frozenset(),
+            ["CREATE TABLE people (id INTEGER, name TEXT, age INTEGER)"],
+            [],
+        )
+        test(
+            "People",
+            frozenset({"ID", "name"}),
+            frozenset({"name", "age"}),
+            frozenset({"id"}),
+            [
+                "CREATE TABLE people (id INTEGER, name TEXT, PRIMARY KEY (id)) WITHOUT ROWID"
+            ],
+            [("people", "name")],
+        )
+
+    def test_load_sheet_keys(self):
+        class Workbook:
+            def iter_rows(self, sheet_name):
+                return iter(sheets[sheet_name])
+
+        sheets = {
+            "Blank": [("ID", "Name"), (1, "Ann"), (None, None)],
+            "Nameless": [("ID", "Name"), (1, "Ann"), (None, "Bob")],
+            "Duplicate": [("ID", "Name"), (1, "Ann"), (1, "Bob")],
+        }
+
+        def test(sheet_name, skip_empty, error=None):
+            db = sqlite3.connect(":memory:", isolation_level=None)
+            self.addCleanup(db.close)
+            load = partial(
+                cli.load_sheet,
+                db.cursor(),
+                Workbook(),
+                sheet_name,
+                frozenset(),
+                frozenset(),
+                frozenset({"id"}),
+                skip_empty,
+                cli.get_logger(False),
+            )
+            if error is None:
+                load()
+                self.assertEqual(
+                    [(1, "Ann")], db.execute("SELECT * FROM blank").fetchall()
+                )
+                return
+            with self.assertRaisesRegex(click.ClickException, error) as raised:
+                load()
+            self.assertIn(sheet_name, raised.exception.message)
+            self.assertIn("--skip-empty", raised.exception.message)
+            self.assertFalse(db.in_transaction)
+            self.assertEqual([], db.execute("SELECT * FROM sqlite_master").fetchall())
+
+        test("Blank", False, "NOT NULL constraint failed")
+        test("Blank", True)
+        test("Nameless", True, "NOT NULL constraint failed")
+        test("Duplicate", False, "UNIQUE constraint failed")
+
+    def test_load_sheet_types(self):
+        class Workbook:
+            def iter_rows(self, sheet_name):
+                return iter(rows)
+
+        # The values after the sampled rows don't match the types of those
+        # before them, so the sheet is reloaded with the types of every row.
+        rows = [("Zip", "Score", "Note", "ID")]
+        rows += [(i, i, None, i) for i in range(200)]
+        rows += [("01234", 1.5, "x", 200)]
+
+        db = sqlite3.connect(":memory:", isolation_level=None)
+        self.addCleanup(db.close)
+        cli.load_sheet(
+            db.cursor(),
+            Workbook(),
+            "Zips",
+            frozenset(),
+            frozenset(),
+            frozenset(),
+            False,
+            cli.get_logger(False),
+        )
+        self.assertEqual(
+            ["CREATE TABLE zips (zip, score, note TEXT, id INTEGER)"],
+            [sql for sql, in db.execute("SELECT sql FROM sqlite_master")],
+        )
+        self.assertEqual(rows[1:], db.execute("SELECT * FROM zips").fetchall())
+        self.assertEqual(
+            [("integer",), ("text",)],
+            db.execute("SELECT DISTINCT typeof(zip) FROM zips").fetchall(),
+        )
+
+    def test_copy_tables(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        part = str(Path(directory.name) / "part.db")
+        with closing(sqlite3.connect(part)) as db, db:
+            db.execute("CREATE TABLE t (a INTEGER, b TEXT)")
+            db.execute("INSERT INTO t VALUES (1, 'x'), (2, 'y')")
+
+        db = sqlite3.connect(":memory:", isolation_level=None)
+        self.addCleanup(db.close)
+        cli.copy_tables(db.cursor(), part, cli.get_logger(False))
+        self.assertEqual(
+            ["CREATE TABLE t (a INTEGER, b TEXT)"],
+            [sql for sql, in db.execute("SELECT sql FROM sqlite_master")],
+        )
+        self.assertEqual([(1, "x"), (2, "y")], db.execute("SELECT * FROM t").fetchall())
+        self.assertEqual(
+            ["main"], [row[1] for row in db.execute("PRAGMA database_list")]
+        )
+
+        # A failed copy is rolled back, and its error is not masked by the
+        # part being detached.
+        with self.assertRaisesRegex(sqlite3.OperationalError, "already exists"):
+            cli.copy_tables(db.cursor(), part, cli.get_logger(False))
+        self.assertFalse(db.in_transaction)
+        self.assertEqual(
+            ["main"], [row[1] for row in db.execute("PRAGMA database_list")]
+        )
+
+    def test_main_jobs(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        spreadsheet = str(Path(directory.name) / "test.xlsx")
+        workbook = openpyxl.Workbook()
+        people = workbook.active
+        people.title = "People"
+        people.append(["ID", "Name"])
+        people.append([1, "Ann"])
+        people.append([2, "Bob"])
+        scores = workbook.create_sheet("Scores")
+        scores.append(["ID", "Score"])
+        scores.append([1, 1.5])
+        workbook.create_sheet("Empty")
+        workbook.save(spreadsheet)
+
+        def dump(*args):
+            database = str(Path(directory.name) / f"test{len(args)}.db")
+            result = CliRunner().invoke(
+                cli.main, [spreadsheet, "--database", database, "-i", "id", *args]
+            )
+            self.assertEqual(0, result.exit_code, result.output)
+            with closing(sqlite3.connect(database)) as db:
+                schema = db.execute("SELECT type, name, sql FROM sqlite_master")
+                schema = schema.fetchall()
+                tables = [
+                    db.execute(f"SELECT * FROM {name}").fetchall()
+                    for kind, name, _ in schema
+                    if kind == "table"
+                ]
+            return schema, tables
+
+        self.assertEqual(dump(), dump("-j", "2"))
+
+        # Sheets that map to the same table fail the same way in parallel.
+        workbook.create_sheet("People!")["A1"] = "ID"
+        workbook.save(spreadsheet)
+        for args in ([], ["-j", "2"]):
+            database = str(Path(directory.name) / f"clash{len(args)}.db")
+            result = CliRunner().invoke(
+                cli.main, [spreadsheet, "--database", database, *args]
+            )
+            self.assertIsInstance(result.exception, sqlite3.OperationalError)
+            self.assertIn("table people already exists", str(result.exception))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,159 @@
+import datetime
+import io
+import re
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import openpyxl
+from openpyxl.styles import Font
+
+from xlsql import reader
+
+
+class TestReader(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "test.xlsx")
+
+        workbook = openpyxl.Workbook()
+        people = workbook.active
+        people.title = "People"
+        people.append(["Name", "ID", "Born", "Score", "Active"])
+        people.append(["Ann", 1, datetime.datetime(2000, 1, 2, 3, 4), 1.5, True])
+        people.append(["Bob", 2, datetime.date(1999, 12, 31), None, False])
+        people["A6"] = "gap"
+        people["E6"] = datetime.time(12, 30)
+        people["D6"] = "=SUM(D2:D3)"
+        sparse = workbook.create_sheet("Sparse")
+        sparse["B2"] = "only"
+        sparse["C3"] = 1000000000000003
+        headless = workbook.create_sheet("Headless")
+        headless["A3"] = "id"
+        headless["B3"] = "name"
+        headless.append([1, "x"])
+        styled = workbook.create_sheet("Styled")
+        styled.append(["id", "name"])
+        styled.append([1, "x"])
+        styled["E5"].font = Font(bold=True)
+        workbook.save(self.path)
+
+    def test_sheetnames(self):
+        workbook = reader.Workbook(self.path)
+        self.addCleanup(workbook.close)
+        self.assertEqual(
+            ["People", "Sparse", "Headless", "Styled"], workbook.sheetnames
+        )
+
+    def test_iter_rows(self):
+        workbook = reader.Workbook(self.path)
+        self.addCleanup(workbook.close)
+        self.assert_rows_match(workbook)
+
+    def test_iter_rows_without_dimensions(self):
+        # Without dimensions, or with the bogus ones some writers record, each
+        # sheet is as wide as its last column holding a value.
+        for dimension in (b"", b'<dimension ref="A1:A1"/>'):
+            path = self.path.replace(".xlsx", "-undimensioned.xlsx")
+            with zipfile.ZipFile(self.path) as source:
+                with zipfile.ZipFile(path, "w") as target:
+                    for info in source.infolist():
+                        data = source.read(info)
+                        if info.filename.startswith("xl/worksheets/"):
+                            data = re.sub(rb"<dimension [^>]*/>", dimension, data)
+                        target.writestr(info, data)
+            workbook = reader.Workbook(path)
+            self.addCleanup(workbook.close)
+            self.assert_rows_match(workbook)
+
+    @unittest.skipUnless(reader.python_calamine, "python-calamine is not installed")
+    def test_calamine_iter_rows(self):
+        workbook = reader.CalamineWorkbook(self.path)
+        self.addCleanup(workbook.close)
+        self.assertEqual(
+            ["People", "Sparse", "Headless", "Styled"], workbook.sheetnames
+        )
+        self.assert_rows_match(workbook)
+
+    def assert_rows_match(self, workbook):
+        # Both readers size a sheet by the cells holding values, from A1, so
+        # the styled cells openpyxl counts are trimmed off.
+        expected = openpyxl.load_workbook(self.path, data_only=True)
+        for sheet_name in workbook.sheetnames:
+            rows = list(expected[sheet_name].iter_rows(values_only=True))
+            while rows and rows[-1].count(None) == len(rows[-1]):
+                rows.pop()
+            width = max(
+                (
+                    i + 1
+                    for row in rows
+                    for i, value in enumerate(row)
+                    if value is not None
+                ),
+                default=0,
+            )
+            self.assertEqual(
+                [row[:width] for row in rows],
+                list(workbook.iter_rows(sheet_name)),
+            )
+
+    def test_iter_elements(self):
+        worksheet = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<x:worksheet xmlns:x="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            '<x:dimension ref="A1:B3"/><x:sheetData>'
+            '<x:row r="1"><x:c r="A1" t="inlineStr"><x:is><x:t>&lt;/x:row&gt;</x:t></x:is></x:c></x:row>'
+            '<x:row r="2"/><x:row r="3"><x:c r="B3"><x:v>3</x:v></x:c></x:row>'
+            "</x:sheetData><x:mergeCells/></x:worksheet>"
+        ).encode()
+        for block_size in (1, 10, 100, 1000):
+            with mock.patch.object(reader, "_BLOCK_SIZE", block_size):
+                elements = reader.iter_elements(io.BytesIO(worksheet))
+                self.assertEqual(
+                    ["1", "2", "3"], [element.get("r") for element in elements]
+                )
+
+        empty = b"<worksheet><sheetData/></worksheet>"
+        self.assertEqual([], list(reader.iter_elements(io.BytesIO(empty))))
+
+    def test_get_used_width(self):
+        worksheet = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<x:worksheet xmlns:x="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            '<x:dimension ref="A1:AAA3"/><x:sheetData>'
+            '<x:row r="1"><x:c r="A1"><x:v>1</x:v></x:c><x:c r="Z1" s="1"/></x:row>'
+            '<x:row r="2"><x:c r="B2" t="inlineStr"><x:is><x:t>b</x:t></x:is></x:c>'
+            '<x:c r="C2"><x:f>A1</x:f><x:v>1</x:v></x:c><x:c r="D2"><x:f>A1</x:f></x:c>'
+            '<x:c r="E2"><x:v></x:v></x:c></x:row>'
+            '<x:row r="3"><x:c s="1" r="AB3"><x:f t="shared" si="0"/><x:v>2</x:v></x:c>'
+            '<x:c r="AAA3" s="1"></x:c></x:row>'
+            "</x:sheetData></x:worksheet>"
+        ).encode()
+        for block_size in (1, 10, 100, 1000):
+            with mock.patch.object(reader, "_BLOCK_SIZE", block_size):
+                self.assertEqual(28, reader.get_used_width(io.BytesIO(worksheet)))
+
+        empty = b"<worksheet><sheetData/></worksheet>"
+        self.assertEqual(0, reader.get_used_width(io.BytesIO(empty)))
+
+    def test_convert(self):
+        def test(value, expected):
+            self.assertEqual(expected, reader.convert(value))
+            self.assertIs(type(expected), type(reader.convert(value)))
+
+        test("", None)
+        test("a", "a")
+        test(1.0, 1)
+        test(1.5, 1.5)
+        test(1000000000000003.0, 1000000000000003)
+        test(1e20, 1e20)
+        test(True, True)
+        test(datetime.date(2000, 1, 2), datetime.datetime(2000, 1, 2))
+        test(datetime.time(1, 2), datetime.time(1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,7 +13,11 @@ Options:
     --column, -c: A column (or columns) to extract. Can be specified multiple times.
     --database: The name of the database to create. (default: database.db)
     --force: Overwrite an existing database.
+    --index, -i: A column (or columns) to index after loading. Can be specified multiple times.
+    --jobs, -j: The number of sheets to load in parallel, each in its own process. (default: 1)
+    --primary-key, -k: A column (or columns) to use as the primary key. Can be specified multiple times.
     --sheet, -s: A sheet (or sheets) to extract. Can be specified multiple times.
+    --skip-empty: Skip rows with no values in the selected columns.
     --verbose, -v: Show verbose output.
 
 Examples:
@@ -31,17 +35,68 @@ Examples:
 
     xlsql example.xlsx -c name -c id -c address -s people
     # Only select the name, id, and address columns from the people sheet.
+
+    xlsql example.xlsx -k id -i name
+    # Key each table containing an id column by it, and index the name columns.
+
+    xlsql example.xlsx --jobs 4
+    # Load up to four sheets at once, using four processes.
 """
 
+import datetime
+import os
+import re
 import sqlite3
+import string
+import tempfile
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
 from pathlib import Path
+from types import NoneType
 
 import click
-import openpyxl
 
+from xlsql import reader
 from xlsql.version import VERSION
 
+# Characters dropped from, or replaced by underscores in, normalized names.
+_IGNORED = "{<([`~!?@#$%^&*,.=:;|])>}"
+_REPLACED = "+- /\\"
+_NORMALIZE_TABLE = str.maketrans(
+    dict.fromkeys(_IGNORED) | dict.fromkeys(_REPLACED, "_")
+)
+
+# ASCII names are lowercased and sanitized in a single bytes.translate call,
+# which also drops the non-printable control characters.
+_ASCII_TABLE = bytes.maketrans(
+    (string.ascii_uppercase + _REPLACED).encode(),
+    (string.ascii_lowercase + "_" * len(_REPLACED)).encode(),
+)
+_ASCII_DELETE = _IGNORED.encode() + bytes(range(32)) + b"\x7f"
+_UNDERSCORES = re.compile("_{2,}")
+
+# Column affinities for the cell values read from the spreadsheet. Dates and times
+# are stored as ISO formatted text.
+_AFFINITIES = {
+    bool: "INTEGER",
+    int: "INTEGER",
+    float: "REAL",
+    str: "TEXT",
+    datetime.datetime: "TEXT",
+    datetime.date: "TEXT",
+    datetime.time: "TEXT",
+}
+
+
+# The number of rows of data sampled to infer the column affinities of a sheet.
+_SAMPLE_ROWS = 128
 
+
+@lru_cache(maxsize=4096)
 def normalize(name: str) -> str:
     """
     Normalize a given name by converting it to lowercase, removing
@@ -53,63 +108,513 @@ def normalize(name: str) -> str:
     Returns:
         str: The normalized name.
     """
+    # Results are cached, since the same headings tend to recur across sheets.
     if name is None:
         return "EMPTY"
-    ignored = set("{<([`~!?@#$%^&*,.=:;|])>}")
-    replace = set("+- /\\")
-    letters = []
-    for c in name.lower():
-        # Sanitize characters for use in SQL.
-        if c.isprintable() and c not in ignored:
-            letters.append(c if c not in replace else "_")
-        # Remove double underscores.
-        if len(letters) > 1:
-            if letters[-1] == "_" and letters[-2] == "_":
-                letters.pop()
-
-    # Strip leading and trailing underscores.
-    while letters and letters[0] == "_":
-        letters.pop(0)
-    while letters and letters[-1] == "_":
-        letters.pop()
-
-    if not letters:
-        return "EMPTY"
 
-    # Join the letters and return the normalized name.
-    return "".join(letters)
+    # Sanitize characters for use in SQL.
+    if name.isascii():
+        normalized = name.encode().translate(_ASCII_TABLE, _ASCII_DELETE).decode()
+    else:
+        normalized = name.lower()
+        if not normalized.isprintable():
+            normalized = "".join(filter(str.isprintable, normalized))
+        normalized = normalized.translate(_NORMALIZE_TABLE)
 
+    # Remove repeated underscores, then leading and trailing ones.
+    normalized = _UNDERSCORES.sub("_", normalized).strip("_")
 
-def get_column_names(sheet_name: str, headings: list[str], log: any) -> list[str]:
+    return normalized or "EMPTY"
+
+
+def get_column_names(sheet_name: str, headings: Sequence[str], log: any) -> list[str]:
     """
     Get unique column names for a given sheet.
 
     Args:
         sheet_name (str): The name of the sheet.
-        headings (list[str]): The list of headings.
+        headings (Sequence[str]): The headings, as read from the first row.
         log (any): The logging function.
 
     Returns:
         list[str]: The list of distinct, normalized column names.
     """
-    seen = {}
+    # Map each name in use to the next suffix to try for a duplicate of it, so
+    # that each suffix is only ever tried once.
+    suffixes = {}
     column_names = []
     for heading in headings:
-        normalized = normalize(heading)
-        while normalized in seen:
-            suffix = seen[normalized]
-            seen[normalized] += 1
-            normalized = f"{normalized}_{suffix}"
+        normalized = name = normalize(heading)
+        if name in suffixes:
+            suffix = suffixes[name]
+            while (name := f"{normalized}_{suffix}") in suffixes:
+                suffix += 1
+            suffixes[normalized] = suffix + 1
             log(
-                f"WARN: duplicate heading in {sheet_name}[{heading}]: renaming to: {normalized}"
+                f"WARN: duplicate heading in {sheet_name}[{heading}]: renaming to: {name}"
             )
-        else:
-            seen[normalized] = 2
-        column_names.append(normalized)
+        suffixes[name] = 2
+        column_names.append(name)
     assert len(column_names) == len(set(column_names))
     return column_names
 
 
+def get_affinity(kinds: set[type]) -> str:
+    """
+    Get the SQLite column affinity for the types of the values in a column.
+
+    A column is only given an affinity when all of its values share one, as
+    SQLite would otherwise convert the values of the other types.
+
+    Args:
+        kinds (set[type]): The types of the values in the column.
+
+    Returns:
+        str: The affinity for the column, or an empty string if its values do
+            not share one.
+    """
+    affinities = {_AFFINITIES.get(kind, "") for kind in kinds if kind is not NoneType}
+    return affinities.pop() if len(affinities) == 1 else ""
+
+
+def get_column_types(rows: list[tuple]) -> list[str]:
+    """
+    Infer a SQLite column affinity for each column from a sample of rows.
+
+    Args:
+        rows (list[tuple]): The sample rows to inspect.
+
+    Returns:
+        list[str]: The affinity for each column, or an empty string for columns
+            whose type could not be determined.
+    """
+    found = []
+    for row in rows:
+        found.extend(set() for _ in range(len(row) - len(found)))
+        for kinds, value in zip(found, row):
+            kinds.add(type(value))
+    return [get_affinity(kinds) for kinds in found]
+
+
+@lru_cache(maxsize=None)
+def get_markers(columns: int, rows: int = 1) -> str:
+    """
+    Get the parameter markers for inserting rows of a given width, cached so
+    that sheets of the same width share them.
+
+    Args:
+        columns (int): The number of columns in each row.
+        rows (int, optional): The number of rows. Defaults to 1.
+
+    Returns:
+        str: The parenthesized markers for each row, separated by commas.
+    """
+    markers = f"({', '.join(['?'] * columns)})"
+    return ", ".join([markers] * rows)
+
+
+def compile_flattener(selected: list[int], width: int) -> Callable[[list], tuple]:
+    """
+    Build a function that flattens the selected cells of a list of rows into
+    a single tuple of statement parameters.
+
+    The selected cells are unrolled into the generated code, so each row is
+    picked apart and flattened in one step, without an intermediate tuple.
+
+    Args:
+        selected (list[int]): The indexes of the selected cells in each row.
+        width (int): The number of cells in each row.
+
+    Returns:
+        Callable[[list], tuple]: The function that flattens a list of rows.
+    """
+    # Flattening whole rows is already done in C.
+    if selected == list(range(width)):
+        return lambda rows: tuple(chain.from_iterable(rows))
+
+    cells = "".join(f"row[{i}], " for i in selected)
+    source = f"def flatten(rows):\n    return tuple([cell for row in rows for cell in ({cells})])\n"
+    namespace = {}
+    exec(compile(source, "<xlsql-flatten>", "exec"), namespace)
+    return namespace["flatten"]
+
+
+def drop_empty_rows(
+    rows: Iterator[tuple], selected: list[int], width: int
+) -> Iterator[tuple]:
+    """
+    Drop the rows without a value in any of the selected cells.
+
+    The missing cells are counted by tuple.count, in C, rather than tested one
+    at a time in Python.
+
+    Args:
+        rows (Iterator[tuple]): The rows to filter.
+        selected (list[int]): The indexes of the selected cells in each row.
+        width (int): The number of cells in each row.
+
+    Returns:
+        Iterator[tuple]: The rows with a value in any of the selected cells.
+    """
+    count = len(selected)
+    if count == width:
+        return (row for row in rows if row.count(None) < count)
+    if count == 1:
+        i = selected[0]
+        return (row for row in rows if row[i] is not None)
+    pick = itemgetter(*selected)
+    return (row for row in rows if pick(row).count(None) < count)
+
+
+def write_rows(
+    cursor: sqlite3.Cursor,
+    insert_row: str,
+    insert_many: str,
+    rows_per_insert: int,
+    flatten: Callable[[list], tuple],
+    rows: Iterator[tuple],
+) -> int:
+    """
+    Insert rows into a table, packing as many rows as possible into each
+    statement.
+
+    The rows are pulled lazily by a single executemany call, so only the rows
+    for the statement being executed are held in memory.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor used to execute the inserts.
+        insert_row (str): An INSERT statement for a single row.
+        insert_many (str): An INSERT statement for rows_per_insert rows.
+        rows_per_insert (int): The number of rows inserted by insert_many.
+        flatten (Callable[[list], tuple]): Flattens the selected cells of a
+            list of rows into statement parameters.
+        rows (Iterator[tuple]): The rows to be inserted.
+
+    Returns:
+        int: The number of rows inserted.
+    """
+    inserted = 0
+    tail = []
+
+    def parameters() -> Iterator[tuple]:
+        nonlocal inserted
+        while len(chunk := list(islice(rows, rows_per_insert))) == rows_per_insert:
+            inserted += rows_per_insert
+            yield flatten(chunk)
+        tail.extend(chunk)
+
+    cursor.executemany(insert_many, parameters())
+    cursor.executemany(insert_row, (flatten([row]) for row in tail))
+    return inserted + len(tail)
+
+
+def track_types(
+    flatten: Callable[[list], tuple], kinds: list[set[type]]
+) -> Callable[[list], tuple]:
+    """
+    Wrap a flattener so that it also records the types of the values in each
+    column, as they are inserted.
+
+    Args:
+        flatten (Callable[[list], tuple]): Flattens the selected cells of a
+            list of rows into statement parameters.
+        kinds (list[set[type]]): The types found in each selected column,
+            updated as rows are flattened.
+
+    Returns:
+        Callable[[list], tuple]: The function that flattens a list of rows.
+    """
+    width = len(kinds)
+
+    def flatten_and_track(rows: list) -> tuple:
+        values = flatten(rows)
+        for i, found in enumerate(kinds):
+            found.update(map(type, values[i::width]))
+        return values
+
+    return flatten_and_track
+
+
+def get_logger(verbose: bool) -> Callable[[str], None]:
+    """
+    Get the function used to log progress messages, chosen once so that quiet
+    runs don't check the verbosity on every message.
+
+    Args:
+        verbose (bool): Whether to show verbose output.
+
+    Returns:
+        Callable[[str], None]: print if verbose, otherwise a function that
+            does nothing.
+    """
+    if verbose:
+        return print
+    return lambda message: None
+
+
+def connect(database: str) -> sqlite3.Connection:
+    """
+    Create a new SQLite database, and connect to it for a bulk load.
+
+    Transactions are managed explicitly, rather than by the driver.
+
+    Args:
+        database (str): The path to the database.
+
+    Returns:
+        sqlite3.Connection: The connection to the database.
+    """
+    # Every sheet has INSERT statements of its own, each prepared once by
+    # executemany, so there is nothing to gain from caching them. Cached
+    # statements also hold on to the last batch of values bound to them, which
+    # for a multi-row INSERT is a whole batch of the sheet, so don't cache any.
+    db = sqlite3.connect(database, isolation_level=None, cached_statements=0)
+
+    # The database is brand new, and is simply rebuilt if the load is
+    # interrupted, so skip the journal file and fsyncs entirely. The journal is
+    # kept in memory rather than turned off, so a failed sheet can still be
+    # rolled back. Larger pages mean fewer, wider B-tree pages to write; the
+    # page size must be set before any tables are created. Memory mapping the
+    # file saves a read() for every page SQLite revisits.
+    db.execute("PRAGMA page_size=65536")
+    db.execute("PRAGMA mmap_size=1073741824")  # 1 GiB
+    db.execute("PRAGMA journal_mode=MEMORY")
+    db.execute("PRAGMA synchronous=OFF")
+    db.execute("PRAGMA temp_store=MEMORY")
+    db.execute("PRAGMA cache_size=-262144")  # 256 MiB page cache
+    db.execute("PRAGMA locking_mode=EXCLUSIVE")
+    return db
+
+
+def load_sheet(
+    cursor: sqlite3.Cursor,
+    workbook: reader.Workbook | reader.CalamineWorkbook,
+    sheet_name: str,
+    column: frozenset[str],
+    index: frozenset[str],
+    primary_key: frozenset[str],
+    skip_empty: bool,
+    log: any,
+) -> list[tuple[str, str]]:
+    """
+    Load a sheet into a new table, inside a single transaction.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor used to create and fill the table.
+        workbook (reader.Workbook | reader.CalamineWorkbook): The workbook.
+        sheet_name (str): The name of the sheet to load.
+        column (frozenset[str]): The columns to extract, or all of them if empty.
+        index (frozenset[str]): The columns to index after loading.
+        primary_key (frozenset[str]): The columns to use as the primary key.
+        skip_empty (bool): Whether to skip rows with no values.
+        log (any): The logging function.
+
+    Returns:
+        list[tuple[str, str]]: The table and column names of the columns to
+            index once every sheet is loaded.
+    """
+    # Reference the data in the rows of the sheet.
+    rows = workbook.iter_rows(sheet_name)
+
+    # Name the table and its columns, after the headings in the first row.
+    headings = next(rows, None)
+    table_name = normalize(sheet_name)
+    if headings is None:
+        log(f"Skipping table {table_name} because sheet '{sheet_name}' is empty.")
+        return []
+    columns = get_column_names(sheet_name, headings, log)
+    log(f"Mapping contents of sheet '{sheet_name}' to table '{table_name}':")
+
+    # Determine which columns in this sheet were selected, and which of those
+    # are keyed or indexed, in one pass. Columns may be named by heading or by
+    # column name.
+    selected = []
+    names = []
+    keys = []
+    indexed = []
+    for i, (heading, name) in enumerate(zip(headings, columns)):
+        if not column or heading in column or name in column:
+            selected.append(i)
+            names.append(name)
+            log(f"  {heading} -> {name}")
+            if heading in primary_key or name in primary_key:
+                keys.append(name)
+            if heading in index or name in index:
+                indexed.append((table_name, name))
+
+    # Only create the table if columns were selected.
+    if not selected:
+        log(f"Skipping table {table_name} because no columns were selected.")
+        return []
+
+    # Declare column affinities based on a sample of the first rows of data,
+    # which are then put back in front of the rest.
+    sample = list(islice(rows, _SAMPLE_ROWS))
+    rows = chain(sample, rows)
+    types = get_column_types(sample)
+    types += [""] * (len(headings) - len(types))
+    affinities = [types[i] for i in selected]
+
+    # Insert the rows as a run of multi-row INSERTs, each sized to stay within
+    # SQLite's limit on bound parameters, and any leftover rows through the
+    # single-row statement.
+    column_list = ", ".join(names)
+    insert_rows = (
+        f"INSERT INTO {table_name} ({column_list}) VALUES {get_markers(len(selected))}"
+    )
+    limit = cursor.connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    rows_per_insert = max(1, limit // len(selected))
+    insert_batch = f"INSERT INTO {table_name} ({column_list}) VALUES {get_markers(len(selected), rows_per_insert)}"
+
+    # Pick out and flatten the selected cells with code generated for this
+    # sheet's columns.
+    flatten = compile_flattener(selected, len(headings))
+
+    while True:
+        # Keyed tables are stored in a B-tree ordered by the key, rather than
+        # by a separate rowid. Tables are otherwise created without indexes or
+        # UNIQUE constraints, which are only built once every sheet is loaded.
+        definitions = ", ".join(
+            f"{name} {affinity}".rstrip() for name, affinity in zip(names, affinities)
+        )
+        create_table_sql = f"CREATE TABLE {table_name} ({definitions})"
+        if keys:
+            create_table_sql = f"CREATE TABLE {table_name} ({definitions}, PRIMARY KEY ({', '.join(keys)})) WITHOUT ROWID"
+
+        # Load the sheet inside a single transaction, so it is committed once
+        # rather than after every statement. The write lock is taken up front,
+        # rather than on the first INSERT.
+        cursor.execute("BEGIN IMMEDIATE")
+        log(f"DB executing SQL: '{create_table_sql};'")
+        cursor.execute(create_table_sql)
+
+        # Optionally drop rows with no values. The rows are streamed into
+        # SQLite by one executemany call, rather than collected into batches
+        # first, and the types of their values are recorded along the way.
+        if skip_empty:
+            rows = drop_empty_rows(rows, selected, len(headings))
+        log(f"DB executing SQL: '{insert_rows};'")
+        kinds = [set() for _ in selected]
+        try:
+            total = write_rows(
+                cursor,
+                insert_rows,
+                insert_batch,
+                rows_per_insert,
+                track_types(flatten, kinds),
+                rows,
+            )
+        except sqlite3.IntegrityError as error:
+            # Only a primary key constrains the values, so a row is missing its
+            # key or repeats another's.
+            cursor.execute("ROLLBACK")
+            raise click.ClickException(
+                f"Can't key sheet '{sheet_name}' by {', '.join(keys)}: {error}. Every row needs a distinct key; rows without any values can be skipped with --skip-empty."
+            ) from error
+
+        # SQLite converts the values that don't match the affinity of their
+        # column, so if the sample was misleading, load the sheet again with
+        # the affinities of all of its values before anything is committed.
+        # Columns without an affinity are stored exactly as read.
+        found = [get_affinity(types) for types in kinds]
+        if all(not a or a == b for a, b in zip(affinities, found)):
+            break
+        log(
+            f"Reloading table {table_name} because its first {_SAMPLE_ROWS} rows don't match the column types of the rest."
+        )
+        cursor.execute("ROLLBACK")
+        affinities = found
+        rows = workbook.iter_rows(sheet_name)
+        next(rows)
+
+    cursor.execute("COMMIT")
+    log(f"Writing {total} rows...")
+    log("DONE!\n")
+    return indexed
+
+
+def load_part(
+    spreadsheet: str,
+    database: str,
+    sheet_name: str,
+    column: frozenset[str],
+    index: frozenset[str],
+    primary_key: frozenset[str],
+    skip_empty: bool,
+    verbose: bool,
+) -> list[tuple[str, str]]:
+    """
+    Load a sheet into a database of its own, so that sheets can be loaded in
+    parallel by separate processes.
+
+    Args:
+        spreadsheet (str): The path to the spreadsheet.
+        database (str): The path to the database to create for the sheet.
+        sheet_name (str): The name of the sheet to load.
+        column (frozenset[str]): The columns to extract, or all of them if empty.
+        index (frozenset[str]): The columns to index after loading.
+        primary_key (frozenset[str]): The columns to use as the primary key.
+        skip_empty (bool): Whether to skip rows with no values.
+        verbose (bool): Whether to show verbose output.
+
+    Returns:
+        list[tuple[str, str]]: The table and column names of the columns to
+            index once every sheet is loaded.
+    """
+
+    log = get_logger(verbose)
+
+    workbook = reader.open_workbook(spreadsheet)
+    try:
+        db = connect(database)
+        try:
+            return load_sheet(
+                db.cursor(),
+                workbook,
+                sheet_name,
+                column,
+                index,
+                primary_key,
+                skip_empty,
+                log,
+            )
+        finally:
+            db.close()
+    finally:
+        workbook.close()
+
+
+def copy_tables(cursor: sqlite3.Cursor, database: str, log: any) -> None:
+    """
+    Copy every table in another database, inside a single transaction.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor used to create and fill the tables.
+        database (str): The path to the database to copy the tables from.
+        log (any): The logging function.
+
+    Returns:
+        None
+    """
+    cursor.execute("ATTACH DATABASE ? AS part", (database,))
+    try:
+        tables = cursor.execute(
+            "SELECT name, sql FROM part.sqlite_master WHERE type = 'table'"
+        ).fetchall()
+        cursor.execute("BEGIN IMMEDIATE")
+        for table_name, create_table_sql in tables:
+            log(f"Copying table {table_name} from {database}.")
+            cursor.execute(create_table_sql)
+            cursor.execute(f"INSERT INTO {table_name} SELECT * FROM part.{table_name}")
+        cursor.execute("COMMIT")
+    finally:
+        # The part can't be detached inside a transaction, so roll back any
+        # failed copy first, rather than masking its error.
+        if cursor.connection.in_transaction:
+            cursor.execute("ROLLBACK")
+        cursor.execute("DETACH DATABASE part")
+
+
 @click.command()
 @click.argument(
     "spreadsheet",
@@ -135,12 +640,38 @@ def get_column_names(sheet_name: str, headings: list[str], log: any) -> list[str
     default=False,
     help="Overwrite an existing database.",
 )
+@click.option(
+    "--index",
+    "-i",
+    multiple=True,
+    help="A column (or columns) to index after loading. Can be specified multiple times.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    help="The number of sheets to load in parallel, each in its own process.",
+)
+@click.option(
+    "--primary-key",
+    "-k",
+    multiple=True,
+    help="A column (or columns) to use as the primary key. Can be specified multiple times.",
+)
 @click.option(
     "--sheet",
     "-s",
     multiple=True,
     help="A sheet (or sheets) to extract. Can be specified multiple times.",
 )
+@click.option(
+    "--skip-empty",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="Skip rows with no values in the selected columns.",
+)
 @click.option(
     "--verbose",
     "-v",
@@ -158,7 +689,20 @@ def get_column_names(sheet_name: str, headings: list[str], log: any) -> list[str
     help="Display the version number.",
 )
 @click.pass_context
-def main(ctx, spreadsheet, column, database, force, sheet, verbose, version) -> None:
+def main(
+    ctx,
+    spreadsheet,
+    column,
+    database,
+    force,
+    index,
+    jobs,
+    primary_key,
+    sheet,
+    skip_empty,
+    verbose,
+    version,
+) -> None:
     """
     Convert an Excel spreadsheet into a SQLite database.
 
@@ -176,121 +720,119 @@ def main(ctx, spreadsheet, column, database, force, sheet, verbose, version) ->
         click.echo(ctx.get_help())
         return
 
-    def log(message: str) -> None:
-        if verbose:
-            print(message)
+    log = get_logger(verbose)
+
+    # Names are checked against the options for every heading and sheet, so
+    # look them up in sets rather than scanning the tuples click provides.
+    column = frozenset(column)
+    index = frozenset(index)
+    primary_key = frozenset(primary_key)
+    sheet = frozenset(sheet)
 
     # Ensure that the target database won't be overwritten, or that it's OK to
-    # overwrite it.
-    existing = Path(database)
-    if database and existing.exists() and existing.stat().st_size:
+    # overwrite it. The file is only stat'ed once, and may disappear before it
+    # is removed.
+    try:
+        existing = os.stat(database).st_size > 0
+    except FileNotFoundError:
+        existing = False
+    if existing:
         log(f"Destination database already exists: {database}")
         if force:
             log("Overwriting due to --force flag.")
-            existing.unlink()
+            with suppress(FileNotFoundError):
+                os.unlink(database)
         else:
             raise click.ClickException(
                 f"Cowardly refusing to overwrite existing db: {database} without --force flag"
             )
 
-    try:
-        # Load the spreadsheet.
-        log(f"Reading contents of speadsheet file: {spreadsheet}")
-        workbook = openpyxl.load_workbook(spreadsheet)
+    # Load the spreadsheet.
+    log(f"Reading contents of speadsheet file: {spreadsheet}")
+    workbook = reader.open_workbook(spreadsheet)
 
+    try:
         # Create a new SQLite database and connect to it.
-        with sqlite3.connect(database) as db:
+        db = connect(database)
+        try:
             log(
                 f"Populating {database} using the contents of {len(workbook.sheetnames)} sheets found in {spreadsheet}."
             )
 
-            # Iterate over the sheets in the workbook.
+            # Skip any sheets that were not explicitly requested.
+            sheet_names = []
             for sheet_name in workbook.sheetnames:
-                # Skip any sheets that were not explicitly requested.
                 if (
                     sheet
                     and sheet_name not in sheet
                     and normalize(sheet_name) not in sheet
                 ):
                     log(f"Skipping sheet named '{sheet_name}'.")
-                    continue
-
-                # Reference the data in the rows of the current sheet.
-                rows = workbook[sheet_name].iter_rows(values_only=True)
-
-                # Create a table for each sheet.
-                headings = list(next(rows))
-                columns = get_column_names(sheet_name, headings, log)
-                table_name = normalize(sheet_name)
-                log(
-                    f"Mapping contents of sheet '{sheet_name}' to table '{table_name}':"
-                )
-
-                # Determine whether any columns in this sheet were selected.
-                selected = []
-                index = 0
-                for heading, column_name in zip(headings, columns):
-                    if not column or heading in column or column_name in column:
-                        selected.append(index)
-                        log(f"  {heading} -> {column_name}")
-                    index += 1
-
-                # Only create the table if columns were selected.
-                if selected:
-                    columns = [columns[i] for i in selected]
-                    create_table_sql = (
-                        f"CREATE TABLE {table_name} ({', '.join(columns)})"
-                    )
-                    log(f"DB executing SQL: '{create_table_sql};'")
-                    db.execute(create_table_sql)
                 else:
-                    log(
-                        f"Skipping table {table_name} because no columns were selected."
+                    sheet_names.append(sheet_name)
+
+            # Share one cursor across all sheets.
+            cursor = db.cursor()
+            indexed = []
+
+            if jobs > 1 and len(sheet_names) > 1:
+                # Load each sheet into a database of its own in a pool of
+                # worker processes, then copy the tables over in sheet order.
+                # The databases are written next to the target database, and
+                # removed afterwards.
+                with tempfile.TemporaryDirectory(
+                    prefix=".xlsql-", dir=Path(database).absolute().parent
+                ) as scratch, ProcessPoolExecutor(jobs) as pool:
+                    parts = [
+                        str(Path(scratch) / f"part{i}.db")
+                        for i in range(len(sheet_names))
+                    ]
+                    futures = [
+                        pool.submit(
+                            load_part,
+                            spreadsheet,
+                            part,
+                            sheet_name,
+                            column,
+                            index,
+                            primary_key,
+                            skip_empty,
+                            verbose,
+                        )
+                        for part, sheet_name in zip(parts, sheet_names)
+                    ]
+                    for part, future in zip(parts, futures):
+                        indexed += future.result()
+                        copy_tables(cursor, part, log)
+            else:
+                for sheet_name in sheet_names:
+                    indexed += load_sheet(
+                        cursor,
+                        workbook,
+                        sheet_name,
+                        column,
+                        index,
+                        primary_key,
+                        skip_empty,
+                        log,
                     )
-                    continue
-
-                # Insert the rows in batches.
-                insert_rows = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(selected))})"
-                cursor = db.cursor()
-                batch: list[tuple[str]] = []
-                total = [0]
-
-                def insert(row: tuple[str], batch_size: int = 1000) -> None:
-                    """
-                    Insert a row into the database.
-
-                    Args:
-                        row (tuple[str]): The row to be inserted.
-                        batch_size (int, optional): The batch size for executing multiple rows at once. Defaults to 1000.
-
-                    Returns:
-                        None
-                    """
-                    flush = False if row else True
-
-                    if row:
-                        batch.append(row)
-
-                    if flush or batch and len(batch) >= batch_size:
-                        log(f"  ... inserting {len(batch)} rows")
-                        cursor.executemany(insert_rows, batch)
-                        total[0] += len(batch)
-                        batch.clear()
-                        if flush:
-                            log(f"Writing {total[0]} rows...")
-                            db.commit()
-
-                # Insert rows in batches, flushing the final rows.
-                log(f"DB executing SQL: '{insert_rows};'")
-                for row in rows:
-                    if row:
-                        if column and selected:
-                            insert([row[i] for i in selected])
-                        else:
-                            insert(row)
-                else:
-                    insert(None)  # Flush a partial batch.
-                    log("DONE!\n")
+
+            # Build the indexes once the tables are fully loaded, so each is
+            # built in one pass rather than updated row by row, then gather
+            # statistics for the query planner.
+            cursor.execute("BEGIN IMMEDIATE")
+            for table_name, column_name in indexed:
+                create_index_sql = f"CREATE INDEX idx_{table_name}_{column_name} ON {table_name} ({column_name})"
+                log(f"DB executing SQL: '{create_index_sql};'")
+                cursor.execute(create_index_sql)
+            if indexed:
+                log("DB executing SQL: 'ANALYZE;'")
+                cursor.execute("ANALYZE")
+            cursor.execute("COMMIT")
+
+        finally:
+            # Closing the connection rolls back any unfinished transaction.
+            db.close()
 
     finally:
         # Clean up.
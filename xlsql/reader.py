@@ -0,0 +1,473 @@
+"""Stream the values in an .xlsx workbook straight from its archive.
+
+Even in read-only mode, openpyxl builds a cell object for every value it reads,
+and parses the whole of any worksheet that doesn't record its dimensions just to
+size it. Parsing the worksheet XML directly yields plain tuples of values in a
+single pass instead, after a quick search of the raw XML to size the worksheet. openpyxl is still used to interpret number formats and
+dates, so values come back exactly as openpyxl would return them.
+"""
+
+import datetime
+import posixpath
+import re
+import zipfile
+from collections.abc import Iterator
+from typing import IO
+from xml.etree.ElementTree import Element, fromstring, iterparse
+
+from openpyxl.styles import numbers
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.utils.datetime import MAC_EPOCH, WINDOWS_EPOCH, from_excel, from_ISO8601
+from openpyxl.xml.constants import PKG_REL_NS, REL_NS, SHEET_MAIN_NS
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+# Workbooks are read, and their worksheets parsed, in blocks of about this many
+# bytes.
+_BLOCK_SIZE = 1 << 20
+
+_ROOT_TAG = re.compile(rb"<([\w.:-]+)")
+_SHEET_DATA_TAG = re.compile(rb"<((?:[\w.-]+:)?)sheetData\b[^>]*?(/?)>")
+# A cell with a value, past any formula, in one of the given columns.
+_VALUE_CELL = (
+    rb'<%(p)sc\b[^>]*?\br="(%(columns)s)\d+"[^>]*?(?<!/)>'
+    rb"(?:<%(p)sf\b[^>]*?(?:/>|>.*?</%(p)sf>))?<%(p)s(?:v>[^<]|is\b)"
+)
+
+_SHEET = f"{{{SHEET_MAIN_NS}}}sheets/{{{SHEET_MAIN_NS}}}sheet"
+_SHEET_ID = f"{{{REL_NS}}}id"
+_WORKBOOK_PROPERTIES = f"{{{SHEET_MAIN_NS}}}workbookPr"
+_RELATIONSHIP = f"{{{PKG_REL_NS}}}Relationship"
+_NUMBER_FORMAT = f"{{{SHEET_MAIN_NS}}}numFmts/{{{SHEET_MAIN_NS}}}numFmt"
+_CELL_STYLE = f"{{{SHEET_MAIN_NS}}}cellXfs/{{{SHEET_MAIN_NS}}}xf"
+_ROW = f"{{{SHEET_MAIN_NS}}}row"
+_VALUE = f"{{{SHEET_MAIN_NS}}}v"
+_INLINE_STRING = f"{{{SHEET_MAIN_NS}}}is"
+_STRING_ITEM = f"{{{SHEET_MAIN_NS}}}si"
+_TEXT = f"{{{SHEET_MAIN_NS}}}t"
+_RUN = f"{{{SHEET_MAIN_NS}}}r"
+
+
+def get_text(element: Element) -> str:
+    """
+    Get the plain text of a string item, ignoring any formatting and phonetic
+    runs.
+
+    Args:
+        element (Element): The string item, such as a shared or inline string.
+
+    Returns:
+        str: The text of the string item.
+    """
+    snippets = [child.text or "" for child in element.iterfind(_TEXT)]
+    snippets += [text.text or "" for text in element.iterfind(f"{_RUN}/{_TEXT}")]
+    return "".join(snippets)
+
+
+def iter_blocks(source: IO[bytes]) -> Iterator[bytes]:
+    """
+    Split a worksheet into its head and blocks of whole rows.
+
+    Each block is cut at the end of its last complete row, so that it can be
+    parsed, or searched, on its own.
+
+    Args:
+        source (IO[bytes]): The worksheet XML.
+
+    Yields:
+        bytes: Everything up to the end of the sheet data's start tag, then
+            each block of rows.
+    """
+    # Read up to the start of the sheet data.
+    head = b""
+    while not (match := _SHEET_DATA_TAG.search(head)):
+        block = source.read(_BLOCK_SIZE)
+        if not block:
+            return
+        head += block
+    yield head[: match.end()]
+
+    prefix, empty = match[1], match[2]
+    end_of_row = b"</%srow>" % prefix
+    end_of_data = b"</%ssheetData>" % prefix
+    buffer = b"" if empty else head[match.end() :]
+    block = not empty
+    while block:
+        block = source.read(_BLOCK_SIZE)
+        buffer += block
+
+        # Cut the buffer at the end of the sheet data, or else after its last
+        # complete row.
+        end = buffer.find(end_of_data)
+        if end >= 0:
+            block = b""
+        elif block:
+            end = buffer.rfind(end_of_row)
+            end = end + len(end_of_row) if end >= 0 else 0
+        else:
+            end = len(buffer)
+        if end:
+            yield buffer[:end]
+            buffer = buffer[end:]
+
+
+def iter_elements(source: IO[bytes]) -> Iterator[Element]:
+    """
+    Parse the rows of a worksheet, a block of rows at a time.
+
+    Each block is parsed in a single call, wrapped in the worksheet's own
+    opening tags, so that the XML parser builds the rows' elements in C rather
+    than handing every element back to Python as it is parsed.
+
+    Args:
+        source (IO[bytes]): The worksheet XML.
+
+    Yields:
+        Element: Each row element.
+    """
+    blocks = iter_blocks(source)
+    head = next(blocks, None)
+    if head is None:
+        return
+
+    # Everything up to and including the sheet data's start tag opens each
+    # block.
+    match = _SHEET_DATA_TAG.search(head)
+    prefix, empty = match[1], match[2]
+    root = _ROOT_TAG.search(head)[1]
+    opening = head[: match.start() if empty else match.end()]
+    closing = b"</%s>" % root if empty else b"</%ssheetData></%s>" % (prefix, root)
+
+    for block in blocks:
+        yield from fromstring(opening + block + closing)[-1]
+
+
+def get_used_width(source: IO[bytes]) -> int:
+    """
+    Find the number of columns in a worksheet, up to the last one holding a
+    value, without parsing it.
+
+    The raw XML is searched for cells holding a value further right than any
+    found so far, which is all done by the regex engine in C.
+
+    Args:
+        source (IO[bytes]): The worksheet XML.
+
+    Returns:
+        int: The number of columns, or 0 if no cell holds a value.
+    """
+    blocks = iter_blocks(source)
+    head = next(blocks, None)
+    if head is None:
+        return 0
+    prefix = _SHEET_DATA_TAG.search(head)[1]
+
+    width = 0
+    pattern = _compile_value_cell(prefix, "")
+    for block in blocks:
+        position = 0
+        while match := pattern.search(block, position):
+            letters = match[1].decode()
+            width = column_index_from_string(letters)
+            position = match.end()
+            pattern = _compile_value_cell(prefix, letters)
+    return width
+
+
+def _compile_value_cell(prefix: bytes, letters: str) -> re.Pattern:
+    """Match a cell holding a value in a column after the lettered one."""
+    # Columns with more letters come later, as do those with as many letters
+    # that sort after them. Column letters run to three, up to XFD.
+    after = [
+        letters[:i] + f"[{chr(ord(letter) + 1)}-Z]" + "[A-Z]" * (len(letters) - i - 1)
+        for i, letter in enumerate(letters)
+        if letter != "Z"
+    ]
+    if len(letters) < 3:
+        after.append(f"[A-Z]{{{len(letters) + 1},3}}")
+    columns = "|".join(after).encode()
+    return re.compile(_VALUE_CELL % {b"p": prefix, b"columns": columns}, re.DOTALL)
+
+
+class Workbook:
+    """
+    A read-only view of the worksheets in an .xlsx workbook.
+
+    Args:
+        path (str): The path to the workbook.
+    """
+
+    def __init__(self, path: str):
+        # Read the archive through a large buffer, which takes far fewer reads
+        # than the default 8 KiB one.
+        self._file = open(path, "rb", buffering=_BLOCK_SIZE)
+        try:
+            self._archive = zipfile.ZipFile(self._file)
+            self._read_workbook()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def _read_xml(self, name: str) -> Element:
+        return fromstring(self._archive.read(name))
+
+    def _read_relationships(self, name: str) -> dict[str, tuple[str, str]]:
+        """Map the ids of a part's relationships to their types and targets."""
+        folder, base = posixpath.split(name)
+        rels = posixpath.join(folder, "_rels", f"{base}.rels")
+        relationships = {}
+        if rels in self._archive.NameToInfo:
+            for rel in self._read_xml(rels).iterfind(_RELATIONSHIP):
+                target = rel.get("Target")
+                if target.startswith("/"):
+                    target = target[1:]
+                else:
+                    target = posixpath.normpath(posixpath.join(folder, target))
+                relationships[rel.get("Id")] = (rel.get("Type"), target)
+        return relationships
+
+    def _read_workbook(self) -> None:
+        # Find the workbook part, and the parts related to it.
+        path = "xl/workbook.xml"
+        for kind, target in self._read_relationships("").values():
+            if kind.endswith("/officeDocument"):
+                path = target
+        relationships = self._read_relationships(path)
+        parts = {
+            kind.rsplit("/", 1)[-1]: target for kind, target in relationships.values()
+        }
+
+        # List the worksheets, skipping chart sheets and the like.
+        workbook = self._read_xml(path)
+        self._worksheets = {}
+        for sheet in workbook.iterfind(_SHEET):
+            kind, target = relationships[sheet.get(_SHEET_ID)]
+            if kind.endswith("/worksheet"):
+                self._worksheets[sheet.get("name")] = target
+        self.sheetnames = list(self._worksheets)
+
+        properties = workbook.find(_WORKBOOK_PROPERTIES)
+        if properties is not None and properties.get("date1904") in ("1", "true"):
+            self.epoch = MAC_EPOCH
+        else:
+            self.epoch = WINDOWS_EPOCH
+
+        # Read the shared strings up front, since any worksheet may use them.
+        self._shared_strings = []
+        if "sharedStrings" in parts:
+            with self._archive.open(parts["sharedStrings"]) as source:
+                for _, element in iterparse(source):
+                    if element.tag == _STRING_ITEM:
+                        self._shared_strings.append(
+                            get_text(element).replace("x005F_", "")
+                        )
+                        element.clear()
+
+        # Index the cell styles that format numbers as dates and durations.
+        self._date_styles = set()
+        self._duration_styles = set()
+        if "styles" in parts:
+            styles = self._read_xml(parts["styles"])
+            formats = {
+                int(fmt.get("numFmtId")): fmt.get("formatCode")
+                for fmt in styles.iterfind(_NUMBER_FORMAT)
+            }
+            for index, style in enumerate(styles.iterfind(_CELL_STYLE)):
+                format_id = int(style.get("numFmtId", 0))
+                fmt = formats.get(format_id) or numbers.builtin_format_code(format_id)
+                if numbers.is_date_format(fmt):
+                    self._date_styles.add(str(index))
+                if numbers.is_timedelta_format(fmt):
+                    self._duration_styles.add(str(index))
+
+    def iter_rows(self, sheet_name: str) -> Iterator[tuple]:
+        """
+        Iterate over the values in each row of a worksheet.
+
+        Rows run from A1 to the last row and column holding a value, as calamine
+        reads them, so styled cells without values and the dimensions recorded
+        in the worksheet are ignored. Missing cells and rows are filled in with
+        None. Formulas give the values cached when the workbook was last saved,
+        as in openpyxl's read-only, data-only mode.
+
+        Args:
+            sheet_name (str): The name of the worksheet.
+
+        Yields:
+            tuple: The values in each row.
+        """
+        strings = self._shared_strings
+        epoch = self.epoch
+        date_styles = self._date_styles
+        duration_styles = self._duration_styles
+        columns = {}
+        expected = 1
+        # Rows without values are held back until a row with values follows.
+        blank = 0
+
+        member = self._worksheets[sheet_name]
+        with self._archive.open(member) as source:
+            width = get_used_width(source)
+        if not width:
+            return
+
+        with self._archive.open(member) as source:
+            for element in iter_elements(source):
+                if element.tag != _ROW:
+                    continue
+
+                # Count any rows missing from the sheet as blank.
+                number = element.get("r")
+                number = int(number) if number else expected
+                blank += number - expected
+                expected = number + 1
+
+                values = [None] * width
+                column = 0
+                for cell in element:
+                    reference = cell.get("r")
+                    if reference:
+                        letters = reference.rstrip("0123456789")
+                        column = columns.get(letters)
+                        if column is None:
+                            column = columns[letters] = column_index_from_string(
+                                letters
+                            )
+                    else:
+                        column += 1
+
+                    kind = cell.get("t", "n")
+                    if kind == "inlineStr":
+                        inline = cell.find(_INLINE_STRING)
+                        value = get_text(inline) if inline is not None else None
+                    else:
+                        value = cell.findtext(_VALUE) or None
+                    if value is None:
+                        pass
+                    elif kind == "n":
+                        if "." in value or "e" in value or "E" in value:
+                            value = float(value)
+                        else:
+                            value = int(value)
+                        style = cell.get("s")
+                        if style in date_styles:
+                            try:
+                                value = from_excel(
+                                    value, epoch, timedelta=style in duration_styles
+                                )
+                            except (OverflowError, ValueError):
+                                value = "#VALUE!"
+                    elif kind == "s":
+                        value = strings[int(value)]
+                    elif kind == "b":
+                        value = bool(int(value))
+                    elif kind == "d":
+                        value = from_ISO8601(value)
+
+                    if column <= width:
+                        values[column - 1] = value
+
+                element.clear()
+                if values.count(None) == width:
+                    blank += 1
+                    continue
+                for _ in range(blank):
+                    yield (None,) * width
+                blank = 0
+                yield tuple(values)
+
+    def close(self) -> None:
+        """Close the workbook's archive."""
+        self._archive.close()
+        self._file.close()
+
+
+def convert(value: object) -> object:
+    """
+    Convert a value read by calamine to the value openpyxl would have read.
+
+    Args:
+        value (object): The value of a cell, as read by calamine.
+
+    Returns:
+        object: The value of the cell, as read by openpyxl.
+    """
+    kind = type(value)
+    if kind is str:
+        # Missing cells are read as empty strings.
+        return value or None
+    if kind is float:
+        # Whole numbers are written without a decimal point, which openpyxl
+        # reads as integers, unless they are too large to be exact.
+        return int(value) if value.is_integer() and abs(value) < 2**53 else value
+    if kind is datetime.date:
+        # Dates are only ever read as datetimes by openpyxl.
+        return datetime.datetime(value.year, value.month, value.day)
+    return value
+
+
+class CalamineWorkbook:
+    """
+    A read-only view of the worksheets in a workbook, parsed by the Rust
+    calamine library rather than in Python. Only available when the optional
+    python-calamine package is installed.
+
+    Values are converted to match those read by Workbook.
+
+    Args:
+        path (str): The path to the workbook.
+    """
+
+    def __init__(self, path: str):
+        self._workbook = python_calamine.CalamineWorkbook.from_path(path)
+        self.sheetnames = [
+            sheet.name
+            for sheet in self._workbook.sheets_metadata
+            if sheet.typ == python_calamine.SheetTypeEnum.WorkSheet
+        ]
+
+    def iter_rows(self, sheet_name: str) -> Iterator[tuple]:
+        """
+        Iterate over the values in each row of a worksheet.
+
+        Rows run from A1 to the last row and column holding a value, as in
+        Workbook.iter_rows.
+
+        Args:
+            sheet_name (str): The name of the worksheet.
+
+        Yields:
+            tuple: The values in each row.
+        """
+        sheet = self._workbook.get_sheet_by_name(sheet_name)
+        if sheet.start is None:
+            return
+
+        # Rows are read from the first row of the sheet, but only from the
+        # first column in use.
+        padding = (None,) * sheet.start[1]
+        for row in sheet.iter_rows():
+            yield padding + tuple(map(convert, row))
+
+    def close(self) -> None:
+        """Close the workbook."""
+        self._workbook.close()
+
+
+def open_workbook(path: str) -> Workbook | CalamineWorkbook:
+    """
+    Open a workbook with calamine when it is installed, or else with the pure
+    Python Workbook.
+
+    Args:
+        path (str): The path to the workbook.
+
+    Returns:
+        Workbook | CalamineWorkbook: The opened workbook.
+    """
+    if python_calamine is not None:
+        return CalamineWorkbook(path)
+    return Workbook(path)